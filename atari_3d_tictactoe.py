@@ -9,9 +9,18 @@ import tkinter as tk
 from tkinter import Canvas, font
 import random
 import math
+from itertools import chain
 from typing import List, Tuple, Optional
 from dataclasses import dataclass
 
+from ttt3d_engine import COORDS, fold_symmetric
+
+# Optional: vectorize the board evaluation with NumPy when it is installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 @dataclass
 class Move:
@@ -75,6 +84,18 @@ class AtariTicTacToe3D:
         # Calculate winning combinations
         self.winning_combinations = self._generate_winning_combinations()
 
+        # The winning combinations passing through each cell (at most 7)
+        self.lines_through_cell = {(layer, row, col): [] for layer in range(self.LAYERS)
+                                   for row in range(self.BOARD_SIZE)
+                                   for col in range(self.BOARD_SIZE)}
+        for combo in self.winning_combinations:
+            for cell in combo:
+                self.lines_through_cell[cell].append(combo)
+        if np is not None:
+            # Flat cell index (layer * 16 + row * 4 + col) of each line's cells
+            self.WIN_INDICES = np.array([[layer * 16 + row * 4 + col for layer, row, col in combo]
+                                         for combo in self.winning_combinations], dtype=np.int16)
+
         # Create GUI
         self.root = tk.Tk()
         self.root.title("Atari 3D Tic-Tac-Toe (4×4×4)")
@@ -83,7 +104,7 @@ class AtariTicTacToe3D:
 
         self.setup_gui()
 
-    def _generate_winning_combinations(self) -> List[List[Tuple[int, int, int]]]:
+    def _generate_winning_combinations(self) -> Tuple[Tuple[Tuple[int, int, int], ...], ...]:
         """Generate all possible winning combinations for 4x4x4 board"""
         wins = []
 
@@ -122,7 +143,8 @@ class AtariTicTacToe3D:
         wins.append([(i, 3-i, i) for i in range(4)])
         wins.append([(i, 3-i, 3-i) for i in range(4)])
 
-        return wins
+        # Tuples, as the lines are only ever iterated
+        return tuple(tuple(combo) for combo in wins)
 
     def setup_gui(self):
         """Create the Atari-style GUI"""
@@ -622,8 +644,12 @@ class AtariTicTacToe3D:
                     if self.board[layer][row][col] == -1:
                         moves.append((layer, row, col))
 
-        # Shuffle for variety
+        # Shuffle for variety, then keep one move from each set of moves
+        # that are equivalent by symmetry
         random.shuffle(moves)
+        flat = list(chain.from_iterable(chain.from_iterable(self.board)))
+        moves = [COORDS[idx] for idx in
+                 fold_symmetric([layer * 16 + row * 4 + col for layer, row, col in moves], flat)]
 
         # Evaluate each move
         for layer, row, col in moves:
@@ -707,6 +733,15 @@ class AtariTicTacToe3D:
     def evaluate_board(self, computer_value: int) -> float:
         """Evaluate the board position"""
         human_value = 1 - computer_value
+
+        if np is not None:
+            # Gather every line's cells in one go and count pieces per line
+            lines = np.array(self.board, dtype=np.int8).ravel()[self.WIN_INDICES]
+            computer_count = (lines == computer_value).sum(axis=1)
+            human_count = (lines == human_value).sum(axis=1)
+            return int((computer_count ** 2)[human_count == 0].sum()
+                       - (human_count ** 2)[computer_count == 0].sum())
+
         score = 0
 
         # Count potential wins for each player
@@ -734,20 +769,17 @@ class AtariTicTacToe3D:
 
     def check_win(self, player_value: int, move: Move) -> bool:
         """Check if the move creates a win"""
-        # Temporarily place piece
-        original = self.board[move.layer][move.row][move.col]
-        self.board[move.layer][move.row][move.col] = player_value
-
-        # Check all winning combinations
-        for combo in self.winning_combinations:
-            if all(self.board[l][r][c] == player_value for l, r, c in combo):
+        # Only lines through the move can be completed by it; the move's own
+        # cell counts as the player's whether or not it is on the board yet
+        cell = (move.layer, move.row, move.col)
+        board = self.board
+        for combo in self.lines_through_cell[cell]:
+            for l, r, c in combo:
+                if board[l][r][c] != player_value and (l, r, c) != cell:
+                    break
+            else:
                 self.winning_cells = combo
-                if original != player_value:
-                    self.board[move.layer][move.row][move.col] = original
                 return True
-
-        # Restore original
-        self.board[move.layer][move.row][move.col] = original
         return False
 
     def is_board_full(self) -> bool:
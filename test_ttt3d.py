@@ -3,7 +3,10 @@
 Test script for 3D Tic-Tac-Toe to verify winning combinations
 """
 
-from ttt3d_4x4x4 import TTT3D, OneMove
+import random
+import threading
+
+from ttt3d_4x4x4 import TTT3D, HAVE_NUMBA, new_compiled_table
 
 def test_winning_combinations():
     """Test that winning combinations are generated correctly"""
@@ -56,6 +59,78 @@ def test_board_indices():
     print(f"(1,0,0) -> {coord_to_index(1,0,0)} (expected: 16)")
     print(f"(3,3,3) -> {coord_to_index(3,3,3)} (expected: 63)")
 
+def _headless_game():
+    """A TTT3D on an empty board, computer playing O, without the GUI"""
+    game = TTT3D.__new__(TTT3D)
+    game.winning_combinations = game._generate_winning_combinations()
+    game.win_masks = [sum(1 << idx for idx in combo) for combo in game.winning_combinations]
+    game.lines_through_cell = [[li for li, combo in enumerate(game.winning_combinations)
+                                if idx in combo] for idx in range(64)]
+    game.human_value = 0
+    game.computer_value = 1
+    game.canvases = []
+    game.search = None
+    game.cancelled = threading.Event()
+    game.clear_board()
+    game.tt = {}
+    if HAVE_NUMBA:
+        game._nb_tt = new_compiled_table()
+    return game
+
+def _empty_cells(game):
+    return [idx for idx in range(64) if not (game.occ[0] | game.occ[1]) >> idx & 1]
+
+def test_counters_match_recount():
+    """Test that _apply/_undo keep the line counters in step with the board"""
+    game = _headless_game()
+    rng = random.Random(0)
+    for _ in range(50):
+        game.clear_board()
+        played = []
+        for _ in range(60):
+            if played and rng.random() < 0.3:
+                game._undo(*played.pop())
+            elif _empty_cells(game):
+                move = (len(played) % 2, rng.choice(_empty_cells(game)))
+                game._apply(*move)
+                played.append(move)
+
+            for value in (0, 1):
+                own, opp = game.occ[value], game.occ[1 - value]
+                pieces = [bin(own & mask).count('1') for mask in game.win_masks]
+                open_lines = [li for li, mask in enumerate(game.win_masks) if not opp & mask]
+                assert game.potential[value] == sum(1 + pieces[li] ** 2 for li in open_lines)
+                assert game.line_count[value] == pieces
+                assert game.threats[value] == {li for li in open_lines if pieces[li] == 3}
+
+def test_compiled_search_matches_look_ahead():
+    """Test that the Numba search scores positions like look_ahead"""
+    if not HAVE_NUMBA:
+        print("Numba is not installed; nothing to compare")
+        return
+
+    game = _headless_game()
+    rng = random.Random(1)
+    compared = 0
+    for _ in range(40):
+        game.clear_board()
+        for ply in range(rng.randint(4, 14)):
+            game._apply(ply % 2, rng.choice(_empty_cells(game)))
+        if game.threats[0] or game.threats[1]:
+            continue  # look_ahead stops at a threat without searching
+
+        for idx in _empty_cells(game)[:6]:
+            game._apply(game.computer_value, idx)
+            game.tt = {}
+            game._nb_tt = new_compiled_table()
+            expected = game.look_ahead(game.human_value, -10000, 10000, 3)
+            assert game._nb_search(game.human_value, game.computer_value, 3) == expected
+            game._undo(game.computer_value, idx)
+            compared += 1
+
+    print(f"Compiled and Python searches agree on {compared} positions")
+    assert compared
+
 if __name__ == "__main__":
     print("="*50)
     print("3D Tic-Tac-Toe (4x4x4) Test Suite")
@@ -63,6 +138,8 @@ if __name__ == "__main__":
 
     test_winning_combinations()
     test_board_indices()
+    test_counters_match_recount()
+    test_compiled_search_matches_look_ahead()
 
     print("\n" + "="*50)
     print("Tests completed!")
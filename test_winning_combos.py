@@ -4,58 +4,35 @@ Test winning combinations generation for 4x4x4 3D Tic-Tac-Toe
 """
 
 def generate_winning_combinations():
-    """Generate all possible winning combinations for 4x4x4 board"""
-    wins = []
-
-    # Helper function to convert 3D coordinates to 1D index
-    def coord_to_index(layer, row, col):
-        return layer * 16 + row * 4 + col
-
-    # 1. Rows on each layer
-    for layer in range(4):
-        for row in range(4):
-            wins.append([coord_to_index(layer, row, col) for col in range(4)])
-
-    # 2. Columns on each layer
-    for layer in range(4):
-        for col in range(4):
-            wins.append([coord_to_index(layer, row, col) for row in range(4)])
-
-    # 3. Diagonals on each layer
-    for layer in range(4):
-        # Main diagonal
-        wins.append([coord_to_index(layer, i, i) for i in range(4)])
-        # Anti-diagonal
-        wins.append([coord_to_index(layer, i, 3-i) for i in range(4)])
-
-    # 4. Vertical lines through layers
-    for row in range(4):
-        for col in range(4):
-            wins.append([coord_to_index(layer, row, col) for layer in range(4)])
-
-    # 5. Diagonal lines through layers (in vertical planes)
-    # Front-to-back diagonals
-    for col in range(4):
-        # Descending
-        wins.append([coord_to_index(i, i, col) for i in range(4)])
-        # Ascending
-        wins.append([coord_to_index(i, 3-i, col) for i in range(4)])
-
-    # Left-to-right diagonals
-    for row in range(4):
-        # Descending
-        wins.append([coord_to_index(i, row, i) for i in range(4)])
-        # Ascending
-        wins.append([coord_to_index(i, row, 3-i) for i in range(4)])
-
-    # 6. Space diagonals (corner to corner)
-    # Main space diagonals
-    wins.append([coord_to_index(i, i, i) for i in range(4)])  # (0,0,0) to (3,3,3)
-    wins.append([coord_to_index(i, i, 3-i) for i in range(4)])  # (0,0,3) to (3,3,0)
-    wins.append([coord_to_index(i, 3-i, i) for i in range(4)])  # (0,3,0) to (3,0,3)
-    wins.append([coord_to_index(i, 3-i, 3-i) for i in range(4)])  # (0,3,3) to (3,0,0)
-
-    return wins
+    """Get all possible winning combinations for 4x4x4 board as cell indices"""
+    from tictactoe_3d import WINNING_LINES
+
+    # Convert 3D coordinates to 1D index
+    return [[layer * 16 + row * 4 + col for layer, row, col in line]
+            for line in WINNING_LINES]
+
+def test_check_winner_matches_masks():
+    """Check the shifted-AND check_winner against testing every line mask"""
+    import random
+    from tictactoe_3d import TicTacToe3D, _WIN_MASKS
+
+    game = TicTacToe3D()
+    rng = random.Random(0)
+
+    # Every line on its own, every line missing one cell, and random boards
+    # of all densities (rows wrapping into the next row must not count)
+    boards = list(_WIN_MASKS)
+    boards += [mask & ~(mask & -mask) for mask in _WIN_MASKS]
+    boards += [rng.getrandbits(64) & rng.getrandbits(64) | rng.getrandbits(64) & rng.getrandbits(64)
+               for _ in range(20000)]
+
+    for bits in boards:
+        game.x_bits, game.o_bits = bits, ~bits & ((1 << 64) - 1)
+        for player, own in ((1, game.x_bits), (-1, game.o_bits)):
+            expected = any(own & mask == mask for mask in _WIN_MASKS)
+            assert game.check_winner(player) == expected, (hex(own), player)
+
+    print(f"✓ check_winner matches the line masks on {len(boards)} boards")
 
 def main():
     print("="*60)
@@ -96,6 +73,8 @@ def main():
     print(f"  Vertical through (0,0): {wins[40]}")
     print(f"  Space diagonal: {wins[-4]}")
 
+    test_check_winner_matches_masks()
+
     print("\n" + "="*60)
     print("All tests passed!" if all_valid and all_valid_range and no_dups else "Some tests failed!")
     print("="*60)
@@ -8,108 +8,191 @@ Difficulty Levels:
 - Insane: Alpha-beta pruning 6 levels deep
 """
 
-from random import choice
-from math import inf
+import sys
+from random import randrange
+
+from ttt3d_engine import SYMMETRIES
+
+# Bitmask with one bit per cell; cell index is z * 16 + y * 4 + x
+FULL_MASK = (1 << 64) - 1
+
+# Base score of a won position; the remaining search depth is added so
+# that faster wins (and slower losses) are preferred
+WIN_SCORE = 1000
+
+# Scores beyond this are wins (no game lasts more than 64 plies)
+WIN_THRESHOLD = WIN_SCORE - 64
+
+# Integer alpha-beta window sentinels (all scores are small ints)
+ALPHA_MIN, BETA_MAX = -10_000, 10_000
+
+# Transposition table entry flags: the stored score is exact, a lower
+# bound (the search failed high) or an upper bound (it failed low)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# The table is kept across turns and games. It stops taking new positions
+# at this size (tens of MB) and starts over on the next move
+TT_MAX_ENTRIES = 200_000
+
+
+def _iter_bits(m):
+    """Yield the index of every set bit in m, lowest first"""
+    while m:
+        lsb = m & -m
+        yield lsb.bit_length() - 1
+        m ^= lsb
+
+
+def _build_tables():
+    """
+    Generate all 76 winning lines of the 4x4x4 board and the lookup
+    tables derived from them. Built once at import time.
+
+    Returns:
+        (lines, masks, lines_through, shifts) - the lines as (z, y, x)
+        tuples, their bitmasks, the masks through each cell, and
+        (step, start-cell bitmask) pairs for check_winner
+    """
+    lines = []
+
+    # 1. Rows within each level (4 levels * 4 rows = 16)
+    for z in range(4):
+        for y in range(4):
+            lines.append([(z, y, x) for x in range(4)])
+
+    # 2. Columns within each level (4 levels * 4 columns = 16)
+    for z in range(4):
+        for x in range(4):
+            lines.append([(z, y, x) for y in range(4)])
+
+    # 3. Diagonals within each level (4 levels * 2 diagonals = 8)
+    for z in range(4):
+        # Main diagonal
+        lines.append([(z, i, i) for i in range(4)])
+        # Anti-diagonal
+        lines.append([(z, i, 3-i) for i in range(4)])
+
+    # 4. Vertical lines through levels (4x4 = 16)
+    for y in range(4):
+        for x in range(4):
+            lines.append([(z, y, x) for z in range(4)])
+
+    # 5. Diagonals in vertical planes (YZ plane, 4 positions * 2 diagonals = 8)
+    for x in range(4):
+        # Main diagonal
+        lines.append([(i, i, x) for i in range(4)])
+        # Anti-diagonal
+        lines.append([(i, 3-i, x) for i in range(4)])
+
+    # 6. Diagonals in vertical planes (XZ plane, 4 positions * 2 diagonals = 8)
+    for y in range(4):
+        # Main diagonal
+        lines.append([(i, y, i) for i in range(4)])
+        # Anti-diagonal
+        lines.append([(i, y, 3-i) for i in range(4)])
+
+    # 7. 3D diagonals (4 space diagonals)
+    # Main 3D diagonal
+    lines.append([(i, i, i) for i in range(4)])
+    # 3D diagonal (z, y, 3-x)
+    lines.append([(i, i, 3-i) for i in range(4)])
+    # 3D diagonal (z, 3-y, x)
+    lines.append([(i, 3-i, i) for i in range(4)])
+    # 3D diagonal (z, 3-y, 3-x)
+    lines.append([(i, 3-i, 3-i) for i in range(4)])
+
+    lines = tuple(tuple(line) for line in lines)
+
+    # Winning lines as bitmasks, and the lines passing through each cell
+    masks = tuple(sum(1 << (z * 16 + y * 4 + x) for z, y, x in line) for line in lines)
+    lines_through = tuple(tuple(m for m in masks if m >> i & 1) for i in range(64))
+
+    # Every line is an arithmetic run of 4 cells: group the lines by
+    # their step d into (d, bitmask of starting cells)
+    starts = {}
+    for line in lines:
+        cells = sorted(z * 16 + y * 4 + x for z, y, x in line)
+        d = cells[1] - cells[0]
+        starts[d] = starts.get(d, 0) | (1 << cells[0])
+
+    return lines, masks, lines_through, tuple(sorted(starts.items()))
+
+
+WINNING_LINES, _WIN_MASKS, _LINES_THROUGH, _WIN_SHIFTS = _build_tables()
+
+
+def _permute_bits(bits, perm):
+    """Map every set bit i of bits to perm[i]"""
+    out = 0
+    for i in _iter_bits(bits):
+        out |= 1 << perm[i]
+    return out
+
 
 class TicTacToe3D:
     """
     3D Tic-Tac-Toe game with 4x4x4 board (64 positions)
     """
+    __slots__ = ('x_bits', 'o_bits', 'difficulty_depths', 'tt')
+
     def __init__(self):
-        # Board: 4 levels, each level is 4x4
-        # board[z][y][x] where z is level (0-3), y is row (0-3), x is column (0-3)
-        self.board = [[[0 for _ in range(4)] for _ in range(4)] for _ in range(4)]
+        # Board: 4 levels, each level is 4x4, stored as one bitboard per player
+        # Cell (z, y, x) is bit z * 16 + y * 4 + x, where z is level (0-3),
+        # y is row (0-3) and x is column (0-3)
+        self.x_bits = 0
+        self.o_bits = 0
         self.difficulty_depths = {
             'easy': 2,
             'difficult': 4,
             'insane': 6
         }
 
+        # Transposition table: position key -> (depth, flag, score). It is
+        # keyed on the position alone, so it stays valid across turns and
+        # games and is deliberately not reset by clear_board()
+        self.tt = {}
+
     def clear_board(self):
         """Reset the board to empty state"""
-        self.board = [[[0 for _ in range(4)] for _ in range(4)] for _ in range(4)]
+        self.x_bits = 0
+        self.o_bits = 0
 
     def display_board(self):
         """Display the 3D board in a 2D representation"""
-        chars = {1: 'X', -1: 'O', 0: ' '}
-        print("\n" + "="*60)
-        print("3D TIC-TAC-TOE BOARD (4x4x4)")
-        print("="*60)
+        x_bits, o_bits = self.x_bits, self.o_bits
+        cells = ['X' if x_bits >> i & 1 else 'O' if o_bits >> i & 1 else ' '
+                 for i in range(64)]
+        rule = "  " + "-" * 17
 
+        # Build the whole frame and write it in one go
+        lines = ["\n" + "="*60, "3D TIC-TAC-TOE BOARD (4x4x4)", "="*60]
         for z in range(4):
-            print(f"\nLevel {z + 1}:")
-            print("    0   1   2   3")
-            print("  " + "-" * 17)
+            lines.append(f"\nLevel {z + 1}:")
+            lines.append("    0   1   2   3")
+            lines.append(rule)
             for y in range(4):
-                print(f"{y} ", end="")
-                for x in range(4):
-                    ch = chars[self.board[z][y][x]]
-                    print(f"| {ch} ", end="")
-                print("|")
-                print("  " + "-" * 17)
-        print("="*60 + "\n")
+                start = z * 16 + y * 4
+                lines.append(f"{y} | " + " | ".join(cells[start:start + 4]) + " |")
+                lines.append(rule)
+        lines.append("="*60 + "\n")
+
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
     def get_all_winning_lines(self):
         """
-        Generate all possible winning lines in 4x4x4 3D tic-tac-toe
+        Get all possible winning lines in 4x4x4 3D tic-tac-toe
         There are 76 possible winning lines total
         """
-        lines = []
-
-        # 1. Rows within each level (4 levels * 4 rows = 16)
-        for z in range(4):
-            for y in range(4):
-                lines.append([(z, y, x) for x in range(4)])
-
-        # 2. Columns within each level (4 levels * 4 columns = 16)
-        for z in range(4):
-            for x in range(4):
-                lines.append([(z, y, x) for y in range(4)])
-
-        # 3. Diagonals within each level (4 levels * 2 diagonals = 8)
-        for z in range(4):
-            # Main diagonal
-            lines.append([(z, i, i) for i in range(4)])
-            # Anti-diagonal
-            lines.append([(z, i, 3-i) for i in range(4)])
-
-        # 4. Vertical lines through levels (4x4 = 16)
-        for y in range(4):
-            for x in range(4):
-                lines.append([(z, y, x) for z in range(4)])
-
-        # 5. Diagonals in vertical planes (YZ plane, 4 positions * 2 diagonals = 8)
-        for x in range(4):
-            # Main diagonal
-            lines.append([(i, i, x) for i in range(4)])
-            # Anti-diagonal
-            lines.append([(i, 3-i, x) for i in range(4)])
-
-        # 6. Diagonals in vertical planes (XZ plane, 4 positions * 2 diagonals = 8)
-        for y in range(4):
-            # Main diagonal
-            lines.append([(i, y, i) for i in range(4)])
-            # Anti-diagonal
-            lines.append([(i, y, 3-i) for i in range(4)])
-
-        # 7. 3D diagonals (4 space diagonals)
-        # Main 3D diagonal
-        lines.append([(i, i, i) for i in range(4)])
-        # 3D diagonal (z, y, 3-x)
-        lines.append([(i, i, 3-i) for i in range(4)])
-        # 3D diagonal (z, 3-y, x)
-        lines.append([(i, 3-i, i) for i in range(4)])
-        # 3D diagonal (z, 3-y, 3-x)
-        lines.append([(i, 3-i, 3-i) for i in range(4)])
-
-        return lines
+        return [list(line) for line in WINNING_LINES]
 
     def check_winner(self, player):
         """Check if the specified player has won"""
-        lines = self.get_all_winning_lines()
-
-        for line in lines:
-            if all(self.board[z][y][x] == player for z, y, x in line):
+        bits = self.x_bits if player == 1 else self.o_bits
+        # For each step d, bit i survives the shifted ANDs only if cells
+        # i, i+d, i+2d and i+3d are all owned; keep only real line starts
+        for d, starts in _WIN_SHIFTS:
+            if bits & (bits >> d) & (bits >> 2 * d) & (bits >> 3 * d) & starts:
                 return True
         return False
 
@@ -117,34 +200,105 @@ class TicTacToe3D:
         """Check if game has been won by either player"""
         return self.check_winner(1) or self.check_winner(-1)
 
-    def get_score(self):
-        """Get the score for the current board state"""
-        if self.check_winner(1):
-            return 10
-        elif self.check_winner(-1):
-            return -10
+    def move_wins(self, i, player):
+        """Check if the player holds a full line through cell i once it is played"""
+        bits = (self.x_bits if player == 1 else self.o_bits) | (1 << i)
+        for m in _LINES_THROUGH[i]:
+            if bits & m == m:
+                return True
+        return False
+
+    def heuristic(self):
+        """
+        Static evaluation of a non-terminal position from X's view
+
+        Every line still open to one player counts the square of that
+        player's marks on it (at most 76 * 9, well below WIN_THRESHOLD)
+        """
+        s = 0
+        xb, ob = self.x_bits, self.o_bits
+        for m in _WIN_MASKS:
+            xa = xb & m
+            oa = ob & m
+            if not oa:
+                s += xa.bit_count() ** 2
+            elif not xa:
+                s -= oa.bit_count() ** 2
+        return s
+
+    def heuristic_delta(self, i, player):
+        """
+        Change in heuristic() when the player takes empty cell i, from
+        that player's view. Only the lines through i are affected.
+        """
+        if player == 1:
+            own, opp = self.x_bits, self.o_bits
         else:
-            return 0
+            own, opp = self.o_bits, self.x_bits
+        delta = 0
+        for m in _LINES_THROUGH[i]:
+            oa = opp & m
+            if not oa:
+                # c marks become c + 1: c*c -> c*c + 2c + 1
+                delta += 2 * (own & m).bit_count() + 1
+            elif not own & m:
+                # The opponent's open line is now blocked
+                delta += oa.bit_count() ** 2
+        return delta
+
+    def blank_mask(self):
+        """Bitmask of the empty cells"""
+        return ~(self.x_bits | self.o_bits) & FULL_MASK
+
+    def iter_blanks(self):
+        """Yield the index (z * 16 + y * 4 + x) of every empty cell"""
+        return _iter_bits(self.blank_mask())
+
+    def root_moves(self):
+        """
+        Bitmask of the empty cells with one representative per class of
+        moves that are equivalent under the symmetries fixing the position
+        """
+        stabilizer = [perm for perm in SYMMETRIES
+                      if _permute_bits(self.x_bits, perm) == self.x_bits
+                      and _permute_bits(self.o_bits, perm) == self.o_bits]
+        if len(stabilizer) == 1:
+            return self.blank_mask()
+
+        moves = 0
+        for i in self.iter_blanks():
+            if min(perm[i] for perm in stabilizer) == i:
+                moves |= 1 << i
+        return moves
 
     def get_blanks(self):
         """Get all empty positions on the board"""
-        blanks = []
-        for z in range(4):
-            for y in range(4):
-                for x in range(4):
-                    if self.board[z][y][x] == 0:
-                        blanks.append((z, y, x))
-        return blanks
+        return [(i >> 4, (i >> 2) & 3, i & 3) for i in self.iter_blanks()]
 
     def board_full(self):
         """Check if the board is completely filled"""
-        return len(self.get_blanks()) == 0
+        return (self.x_bits | self.o_bits) == FULL_MASK
+
+    def get_cell(self, z, y, x):
+        """Get the value of a cell (1 for X, -1 for O, 0 for empty)"""
+        i = z * 16 + y * 4 + x
+        if self.x_bits >> i & 1:
+            return 1
+        if self.o_bits >> i & 1:
+            return -1
+        return 0
 
     def set_move(self, z, y, x, player):
         """Place a move on the board"""
-        self.board[z][y][x] = player
+        bit = 1 << (z * 16 + y * 4 + x)
+        self.x_bits &= ~bit
+        self.o_bits &= ~bit
+        if player == 1:
+            self.x_bits |= bit
+        elif player == -1:
+            self.o_bits |= bit
 
-    def alpha_beta_minimax(self, depth, alpha, beta, player):
+    def alpha_beta_minimax(self, depth, alpha, beta, player, root_moves=None):
         """
         Alpha-Beta Pruning algorithm for 3D Tic-Tac-Toe
 
@@ -153,45 +307,166 @@ class TicTacToe3D:
             alpha: Alpha value for pruning
             beta: Beta value for pruning
             player: Current player (1 for X, -1 for O)
+            root_moves: Optional bitmask of candidate moves (defaults to all blanks)
 
         Returns:
             [z, y, x, score] - best move and its score
         """
-        z_pos = -1
-        y_pos = -1
-        x_pos = -1
+        if depth == 0 or self.board_full():
+            return [-1, -1, -1, self.heuristic()]
+        if root_moves is None:
+            root_moves = self.blank_mask()
+        best, score = self._root(depth, alpha, beta, player, root_moves)
+        if best < 0:
+            return [-1, -1, -1, score]
+        return [best >> 4, (best >> 2) & 3, best & 3, score]
+
+    def _root(self, depth, alpha, beta, player, moves):
+        """
+        Search the root moves (depth >= 1) and keep track of the best one
 
-        # Terminal conditions
-        if depth == 0 or self.game_won() or self.board_full():
-            return [z_pos, y_pos, x_pos, self.get_score()]
+        Returns:
+            (cell index, score) - the index is -1 if no move beat the window
+        """
+        best = -1
+        h = self.heuristic()
+
+        # Rotate the root scan to start at a random cell, so the first of
+        # several equally scored moves is not always the lowest index
+        jitter = randrange(64)
+        moves = ((moves >> jitter) | (moves << (64 - jitter))) & FULL_MASK
+
+        while moves:
+            lsb = moves & -moves
+            moves ^= lsb
+            i = (lsb.bit_length() - 1 + jitter) & 63
+            lsb = 1 << i
+
+            if self.move_wins(i, player):
+                return i, player * (WIN_SCORE + depth)
+
+            child_h = h + player * self.heuristic_delta(i, player)
+            if player == 1:
+                self.x_bits |= lsb
+                score = self._search(depth - 1, alpha, beta, -1, child_h)
+                self.x_bits ^= lsb
+                if score > alpha:
+                    alpha = score
+                    best = i
+            else:
+                self.o_bits |= lsb
+                score = self._search(depth - 1, alpha, beta, 1, child_h)
+                self.o_bits ^= lsb
+                if score < beta:
+                    beta = score
+                    best = i
 
-        blanks = self.get_blanks()
+            if alpha >= beta:
+                break
+
+        return best, alpha if player == 1 else beta
+
+    def _search(self, depth, alpha, beta, player, h):
+        """
+        Score the current position with alpha-beta below the root
+
+        Args:
+            h: heuristic() of the current position, kept up to date
+               incrementally by the caller
 
-        for cell in blanks:
-            z, y, x = cell
-            self.set_move(z, y, x, player)
-            score = self.alpha_beta_minimax(depth - 1, alpha, beta, -player)
+        Returns:
+            The score only; the root is the only node that needs a move
+        """
+        # Terminal conditions (wins are scored by the move that makes them);
+        # at the depth limit fall back to the static evaluation
+        if depth == 0 or self.board_full():
+            return h
+
+        # Probe the transposition table. Win scores are stored relative to
+        # this node's depth, see below
+        key = (self.x_bits << 65) | (self.o_bits << 1) | (player > 0)
+        entry = self.tt.get(key)
+        if entry is not None and entry[0] >= depth:
+            score = entry[2]
+            if score > WIN_THRESHOLD:
+                score += depth
+            elif score < -WIN_THRESHOLD:
+                score -= depth
+            if entry[1] == EXACT:
+                return score
+            if entry[1] == LOWER:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if alpha >= beta:
+                return score
+        alpha_orig, beta_orig = alpha, beta
+
+        # Walk the move bits directly and make/undo moves on the bitboards
+        # only, so no per-node list or board write is needed
+        moves = self.blank_mask()
+        while moves:
+            lsb = moves & -moves
+            moves ^= lsb
+            i = lsb.bit_length() - 1
+
+            # A winning move is the best this player can do here
+            if self.move_wins(i, player):
+                return player * (WIN_SCORE + depth)
+
+            # Update the static evaluation incrementally before placing
+            child_h = h + player * self.heuristic_delta(i, player)
 
             if player == 1:  # Maximizing player (X)
-                if score[3] > alpha:
-                    alpha = score[3]
-                    z_pos, y_pos, x_pos = z, y, x
+                self.x_bits |= lsb
+                score = self._search(depth - 1, alpha, beta, -1, child_h)
+                self.x_bits ^= lsb
+                if score > alpha:
+                    alpha = score
             else:  # Minimizing player (O)
-                if score[3] < beta:
-                    beta = score[3]
-                    z_pos, y_pos, x_pos = z, y, x
-
-            # Undo move
-            self.set_move(z, y, x, 0)
+                self.o_bits |= lsb
+                score = self._search(depth - 1, alpha, beta, 1, child_h)
+                self.o_bits ^= lsb
+                if score < beta:
+                    beta = score
 
             # Alpha-beta pruning
             if alpha >= beta:
                 break
 
-        if player == 1:
-            return [z_pos, y_pos, x_pos, alpha]
+        score = alpha if player == 1 else beta
+
+        if score <= alpha_orig:
+            flag = UPPER
+        elif score >= beta_orig:
+            flag = LOWER
         else:
-            return [z_pos, y_pos, x_pos, beta]
+            flag = EXACT
+        # Store wins as WIN_SCORE minus plies-to-win so the entry can be
+        # reused at a different remaining depth
+        stored = score
+        if score > WIN_THRESHOLD:
+            stored -= depth
+        elif score < -WIN_THRESHOLD:
+            stored += depth
+        if len(self.tt) < TT_MAX_ENTRIES or key in self.tt:
+            self.tt[key] = (depth, flag, stored)
+
+        return score
+
+    def forced_move(self):
+        """
+        Find a one-ply tactical move for the AI (O)
+
+        Returns:
+            Index of a cell that wins for O, else of a cell that blocks an
+            immediate win for X, else None
+        """
+        for player in (-1, 1):
+            for i in self.iter_blanks():
+                if self.move_wins(i, player):
+                    return i
+        return None
 
     def ai_move(self, difficulty='difficult'):
         """
@@ -200,23 +475,27 @@ class TicTacToe3D:
         Args:
             difficulty: 'easy' (depth 2), 'difficult' (depth 4), or 'insane' (depth 6)
         """
-        blanks = self.get_blanks()
-
-        # If board is empty or nearly empty, make a random move for efficiency
-        if len(blanks) >= 60:
-            z, y, x = choice(blanks)
+        # Take an immediate win, or block the player's, without searching
+        i = self.forced_move()
+        if i is not None:
+            z, y, x = i >> 4, (i >> 2) & 3, i & 3
             self.set_move(z, y, x, -1)
             print(f"AI (O) placed at Level {z+1}, Row {y}, Col {x}")
             return
 
+        blanks = self.get_blanks()
+
         # Use alpha-beta pruning with appropriate depth
         depth = self.difficulty_depths.get(difficulty, 4)
 
+        if len(self.tt) >= TT_MAX_ENTRIES:
+            self.tt.clear()
+
         # Limit depth based on number of empty cells to avoid excessive computation
         max_depth = min(depth, len(blanks))
 
         print(f"AI thinking (Difficulty: {difficulty.upper()}, Depth: {max_depth})...")
-        result = self.alpha_beta_minimax(max_depth, -inf, inf, -1)
+        result = self.alpha_beta_minimax(max_depth, ALPHA_MIN, BETA_MAX, -1, self.root_moves())
 
         z, y, x = result[0], result[1], result[2]
         self.set_move(z, y, x, -1)
@@ -237,7 +516,7 @@ class TicTacToe3D:
                     print("Invalid input! All values must be in range.")
                     continue
 
-                if (level, row, col) not in self.get_blanks():
+                if not self.blank_mask() >> (level * 16 + row * 4 + col) & 1:
                     print("That position is already taken! Try again.")
                     continue
 
@@ -264,14 +543,21 @@ class TicTacToe3D:
         print("="*60 + "\n")
 
 
-def play_game():
-    """Main game loop"""
+def play_game(game=None):
+    """
+    Main game loop
+
+    Args:
+        game: TicTacToe3D to reuse (keeps the AI's transposition table
+            from previous games); a new one is created if omitted
+    """
     print("="*60)
     print("3D TIC-TAC-TOE with ALPHA-BETA PRUNING")
     print("4x4x4 Board (64 positions)")
     print("="*60)
 
-    game = TicTacToe3D()
+    if game is None:
+        game = TicTacToe3D()
 
     # Select difficulty
     print("\nSelect difficulty level:")
@@ -341,7 +627,7 @@ def play_game():
     # Ask to play again
     play_again = input("Play again? (y/n): ").lower()
     if play_again == 'y':
-        play_game()
+        play_game(game)
 
 
 # Driver Code
@@ -9,26 +9,66 @@ Enhanced with fancy Canvas-based icons for X and O pieces
 
 import tkinter as tk
 from tkinter import ttk, Canvas
+import copy
 import random
-from typing import List, Tuple, Optional
-from dataclasses import dataclass
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from ttt3d_engine import (
+    CELLS, COORDS, FULL_BOARD, ZOBRIST_KEYS, ZOBRIST_SIDE, EXACT, LOWER, UPPER,
+    WINNING_COMBINATIONS, WIN_MASKS, LINES_THROUGH_CELL, OPENING_CELLS, fold_symmetric,
+)
+from ttt3d_compiled import HAVE_NUMBA, compiled_search, new_compiled_table, warm_up
+
+# Icon tags by piece value (0 = X, 1 = O), as drawn by FancyIcon.prerender
+_PIECE_TAGS = ('x', 'o')
+_WIN_TAGS = ('x_win', 'o_win')
+
+# Transposition table entries kept before a search starts over with an
+# empty table: a Python entry (a 4-tuple) takes ~180 bytes, a compiled one
+# far less
+_TT_LIMIT = 200_000
+_NB_TT_LIMIT = 1 << 19
+
+# Seconds the computer may think per move. Each deepening pass takes
+# several times longer than the one before, so a new pass is only started
+# while less than a quarter of this has been used, and one that overruns it
+# is abandoned
+_THINK_TIME = 2.0
 
 
-@dataclass
-class OneMove:
-    """Represents a single move on the board"""
-    layer: int
-    row: int
-    column: int
+class FancyIcon:
+    """
+    Creates fancy Canvas-based icons for X and O pieces
 
+    Each draw_* method either redraws the canvas from scratch or, given a
+    tag, adds its items hidden under that tag so prerender()/show() can
+    switch icons without creating any canvas items
+    """
 
-class FancyIcon:
-    """Creates fancy Canvas-based icons for X and O pieces"""
+    @staticmethod
+    def prerender(canvas: Canvas, size: int = 40):
+        """Draw every icon onto the canvas once, hidden, for show()"""
+        FancyIcon.draw_x(canvas, size, 'x')
+        FancyIcon.draw_o(canvas, size, 'o')
+        FancyIcon.draw_x_win(canvas, size, 'x_win')
+        FancyIcon.draw_o_win(canvas, size, 'o_win')
+
+    @staticmethod
+    def show(canvas: Canvas, tag: Optional[str] = None):
+        """Show the pre-rendered icon 'x', 'o', 'x_win' or 'o_win' (None: empty)"""
+        canvas.itemconfigure('all', state=tk.HIDDEN)
+        if tag is not None:
+            canvas.itemconfigure(tag, state=tk.NORMAL)
 
     @staticmethod
-    def draw_x(canvas: Canvas, size: int = 40):
+    def draw_x(canvas: Canvas, size: int = 40, tag: Optional[str] = None):
         """Draw a fancy X with gradient effect"""
-        canvas.delete("all")
+        if tag is None:
+            canvas.delete("all")
+        item = {'tags': tag, 'state': tk.HIDDEN} if tag else {}
         padding = size * 0.2
 
         # Draw shadow for depth
@@ -37,14 +77,16 @@ class FancyIcon:
             size - padding + 2, size - padding + 2,
             width=size * 0.15,
             fill='#888888',
-            capstyle=tk.ROUND
+            capstyle=tk.ROUND,
+            **item
         )
         canvas.create_line(
             size - padding + 2, padding + 2,
             padding + 2, size - padding + 2,
             width=size * 0.15,
             fill='#888888',
-            capstyle=tk.ROUND
+            capstyle=tk.ROUND,
+            **item
         )
 
         # Draw main X in blue gradient
@@ -54,7 +96,8 @@ class FancyIcon:
             width=size * 0.15,
             fill='#2E86DE',
             capstyle=tk.ROUND,
-            smooth=True
+            smooth=True,
+            **item
         )
         canvas.create_line(
             size - padding, padding,
@@ -62,7 +105,8 @@ class FancyIcon:
             width=size * 0.15,
             fill='#54A0FF',
             capstyle=tk.ROUND,
-            smooth=True
+            smooth=True,
+            **item
         )
 
         # Add highlights
@@ -71,13 +115,16 @@ class FancyIcon:
             size - padding - 2, size - padding,
             width=size * 0.05,
             fill='#74B9FF',
-            capstyle=tk.ROUND
+            capstyle=tk.ROUND,
+            **item
         )
 
     @staticmethod
-    def draw_o(canvas: Canvas, size: int = 40):
+    def draw_o(canvas: Canvas, size: int = 40, tag: Optional[str] = None):
         """Draw a fancy O with gradient effect"""
-        canvas.delete("all")
+        if tag is None:
+            canvas.delete("all")
+        item = {'tags': tag, 'state': tk.HIDDEN} if tag else {}
         padding = size * 0.2
 
         # Draw shadow for depth
@@ -85,7 +132,8 @@ class FancyIcon:
             padding + 2, padding + 2,
             size - padding + 2, size - padding + 2,
             outline='#888888',
-            width=size * 0.15
+            width=size * 0.15,
+            **item
         )
 
         # Draw outer circle in red gradient
@@ -93,7 +141,8 @@ class FancyIcon:
             padding, padding,
             size - padding, size - padding,
             outline='#EE5A6F',
-            width=size * 0.15
+            width=size * 0.15,
+            **item
         )
 
         # Draw inner highlight circle
@@ -102,7 +151,8 @@ class FancyIcon:
             inner_padding, inner_padding,
             size - inner_padding, size - inner_padding,
             outline='#FF6B81',
-            width=size * 0.08
+            width=size * 0.08,
+            **item
         )
 
         # Add highlight arc for 3D effect
@@ -113,13 +163,16 @@ class FancyIcon:
             extent=60,
             outline='#FF9FF3',
             width=size * 0.05,
-            style=tk.ARC
+            style=tk.ARC,
+            **item
         )
 
     @staticmethod
-    def draw_x_win(canvas: Canvas, size: int = 40):
+    def draw_x_win(canvas: Canvas, size: int = 40, tag: Optional[str] = None):
         """Draw a fancy X in winning color (gold)"""
-        canvas.delete("all")
+        if tag is None:
+            canvas.delete("all")
+        item = {'tags': tag, 'state': tk.HIDDEN} if tag else {}
         padding = size * 0.2
 
         # Draw shadow
@@ -128,14 +181,16 @@ class FancyIcon:
             size - padding + 2, size - padding + 2,
             width=size * 0.18,
             fill='#DAA520',
-            capstyle=tk.ROUND
+            capstyle=tk.ROUND,
+            **item
         )
         canvas.create_line(
             size - padding + 2, padding + 2,
             padding + 2, size - padding + 2,
             width=size * 0.18,
             fill='#DAA520',
-            capstyle=tk.ROUND
+            capstyle=tk.ROUND,
+            **item
         )
 
         # Draw main X in gold
@@ -144,20 +199,24 @@ class FancyIcon:
             size - padding, size - padding,
             width=size * 0.15,
             fill='#FFD700',
-            capstyle=tk.ROUND
+            capstyle=tk.ROUND,
+            **item
         )
         canvas.create_line(
             size - padding, padding,
             padding, size - padding,
             width=size * 0.15,
             fill='#FFD700',
-            capstyle=tk.ROUND
+            capstyle=tk.ROUND,
+            **item
         )
 
     @staticmethod
-    def draw_o_win(canvas: Canvas, size: int = 40):
+    def draw_o_win(canvas: Canvas, size: int = 40, tag: Optional[str] = None):
         """Draw a fancy O in winning color (gold)"""
-        canvas.delete("all")
+        if tag is None:
+            canvas.delete("all")
+        item = {'tags': tag, 'state': tk.HIDDEN} if tag else {}
         padding = size * 0.2
 
         # Draw shadow
@@ -165,7 +224,8 @@ class FancyIcon:
             padding + 2, padding + 2,
             size - padding + 2, size - padding + 2,
             outline='#DAA520',
-            width=size * 0.18
+            width=size * 0.18,
+            **item
         )
 
         # Draw main O in gold
@@ -173,47 +233,112 @@ class FancyIcon:
             padding, padding,
             size - padding, size - padding,
             outline='#FFD700',
-            width=size * 0.15
+            width=size * 0.15,
+            **item
         )
 
 
 class TTT3D:
     """Main game class for 3D Tic-Tac-Toe"""
 
+    __slots__ = (
+        # Board and search state
+        'BOARD_SIZE', 'LAYERS', 'WIN_LENGTH', 'occ', 'zkey', 'flat', 'line_count',
+        'potential', 'threats', 'winning_combinations', 'win_masks', 'lines_through_cell',
+        'tt', '_nb_tt', 'killers', 'rng', 'executor', 'search', 'cancelled',
+        'progress',
+        # Settings and scores
+        'human_first', 'human_piece', 'computer_piece', 'human_value', 'computer_value',
+        'difficulty', 'total_looks_ahead', 'human_score', 'computer_score', 'win',
+        'final_win', 'final_win_buttons',
+        # Widgets
+        'root', 'canvases', 'status_label', 'score_label', 'piece_var', 'first_var',
+        'diff_var',
+    )
+
     def __init__(self):
         # Game configuration
         self.BOARD_SIZE = 4  # 4x4x4 board
         self.LAYERS = 4
         self.WIN_LENGTH = 4  # Need 4 in a row to win
 
-        # Game state
-        self.config = [[[-1 for _ in range(self.BOARD_SIZE)]
-                       for _ in range(self.BOARD_SIZE)]
-                      for _ in range(self.LAYERS)]
-        self.board_buttons = [[[None for _ in range(self.BOARD_SIZE)]
-                               for _ in range(self.BOARD_SIZE)]
-                              for _ in range(self.LAYERS)]
-        self.board_canvases = [[[None for _ in range(self.BOARD_SIZE)]
-                                for _ in range(self.BOARD_SIZE)]
-                               for _ in range(self.LAYERS)]
+        # Game state: one 64-bit bitboard per piece value (0 = X, 1 = O),
+        # bit index layer * 16 + row * 4 + col
+        self.occ = [0, 0]
+        self.zkey = 0
+
+        # The same position as one byte per cell: the piece value, or 255
+        # (-1 as a signed byte) for an empty cell
+        self.flat = bytearray(b'\xff' * 64)
+
+        # Pieces of each value on every winning line, kept up to date by
+        # _apply/_undo
+        self.line_count = [[0] * 76, [0] * 76]
+
+        # Heuristic weight of each value's open lines (free of opponent
+        # pieces): 1 plus the square of the value's pieces on the line, so
+        # near-complete lines dominate
+        self.potential = [76, 76]
+
+        # Lines on which each value has 3 pieces and the opponent none: the
+        # empty fourth cell wins on the spot
+        self.threats = [set(), set()]
+
+        # One canvas per cell, indexed like the bitboards
+        self.canvases: List[Optional[Canvas]] = [None] * 64
 
         # Game settings
         self.human_first = True
         self.human_piece = 'X'
         self.computer_piece = 'O'
+        # The same as piece values (0 = X, 1 = O), looked up by the search
+        self.human_value = 0
+        self.computer_value = 1
         self.difficulty = 2  # 1=Easy, 2=Medium, 3=Hard
         self.total_looks_ahead = 2
-        self.look_ahead_counter = 0
+
+        # Transposition table: Zobrist key of the position and side to move ->
+        # (remaining depth, EXACT/LOWER/UPPER, score, best cell or -1).
+        # Scores depend only on the position and which value the computer
+        # plays, so the table is kept across rounds until the pieces change
+        self.tt = {}
+
+        # Killer moves: the last move to cause a cutoff at each remaining
+        # search depth, tried early at sibling nodes
+        self.killers = [-1] * 8
+
+        # Random source for the computer's choices
+        self.rng = random.Random()
+
+        # The computer searches on a worker thread; self.search is the
+        # pending result while it thinks
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.search = None
+
+        # Set to stop the pending search once it is abandoned; each search
+        # gets a new event, shared with its snapshot
+        self.cancelled = threading.Event()
+
+        # Depth of the search's current deepening pass, written by the
+        # worker into this list (shared with its snapshot) for the status line
+        self.progress = [0]
 
         # Score tracking
         self.human_score = 0
         self.computer_score = 0
         self.win = False
-        self.final_win = []
+        self.final_win = 0
         self.final_win_buttons = []
 
-        # Calculate all winning combinations for 4x4x4
-        self.winning_combinations = self._generate_winning_combinations()
+        # Winning lines are shared by every game
+        self.winning_combinations = WINNING_COMBINATIONS
+        self.win_masks = WIN_MASKS
+        self.lines_through_cell = LINES_THROUGH_CELL
+        if HAVE_NUMBA:
+            self._nb_tt = new_compiled_table()
+            # Have the search ready before the computer's first move, while
+            # the worker is otherwise idle
+            self.executor.submit(warm_up)
 
         # Create GUI
         self.root = tk.Tk()
@@ -223,59 +348,16 @@ class TTT3D:
 
         self.setup_gui()
 
-    def _generate_winning_combinations(self) -> List[List[int]]:
+    def _generate_winning_combinations(self) -> Tuple[Tuple[int, ...], ...]:
         """Generate all possible winning combinations for 4x4x4 board"""
-        wins = []
+        return WINNING_COMBINATIONS
 
-        # Helper function to convert 3D coordinates to 1D index
-        def coord_to_index(layer, row, col):
-            return layer * 16 + row * 4 + col
-
-        # 1. Rows on each layer
-        for layer in range(4):
-            for row in range(4):
-                wins.append([coord_to_index(layer, row, col) for col in range(4)])
-
-        # 2. Columns on each layer
-        for layer in range(4):
-            for col in range(4):
-                wins.append([coord_to_index(layer, row, col) for row in range(4)])
-
-        # 3. Diagonals on each layer
-        for layer in range(4):
-            # Main diagonal
-            wins.append([coord_to_index(layer, i, i) for i in range(4)])
-            # Anti-diagonal
-            wins.append([coord_to_index(layer, i, 3-i) for i in range(4)])
-
-        # 4. Vertical lines through layers
-        for row in range(4):
-            for col in range(4):
-                wins.append([coord_to_index(layer, row, col) for layer in range(4)])
-
-        # 5. Diagonal lines through layers (in vertical planes)
-        # Front-to-back diagonals
-        for col in range(4):
-            # Descending
-            wins.append([coord_to_index(i, i, col) for i in range(4)])
-            # Ascending
-            wins.append([coord_to_index(i, 3-i, col) for i in range(4)])
-
-        # Left-to-right diagonals
-        for row in range(4):
-            # Descending
-            wins.append([coord_to_index(i, row, i) for i in range(4)])
-            # Ascending
-            wins.append([coord_to_index(i, row, 3-i) for i in range(4)])
-
-        # 6. Space diagonals (corner to corner)
-        # Main space diagonals
-        wins.append([coord_to_index(i, i, i) for i in range(4)])  # (0,0,0) to (3,3,3)
-        wins.append([coord_to_index(i, i, 3-i) for i in range(4)])  # (0,0,3) to (3,3,0)
-        wins.append([coord_to_index(i, 3-i, i) for i in range(4)])  # (0,3,0) to (3,0,3)
-        wins.append([coord_to_index(i, 3-i, 3-i) for i in range(4)])  # (0,3,3) to (3,0,0)
-
-        return wins
+    @property
+    def config(self) -> List[List[List[int]]]:
+        """Nested [layer][row][col] view of the board (-1 empty, 0 X, 1 O)"""
+        cells = [-1 if value == 255 else value for value in self.flat]
+        return [[cells[base:base + 4] for base in range(layer, layer + 16, 4)]
+                for layer in range(0, 64, 16)]
 
     def setup_gui(self):
         """Create the GUI layout"""
@@ -322,36 +404,25 @@ class TTT3D:
             # Create 4x4 grid for this layer
             for row in range(4):
                 for col in range(4):
-                    # Create a frame to hold both button and canvas
+                    # Create a frame to hold the canvas
                     cell_frame = tk.Frame(layer_frame, bg='white', relief=tk.RAISED, bd=2)
                     cell_frame.grid(row=row, column=col, padx=2, pady=2)
 
-                    # Create canvas for drawing fancy icons
+                    # Create canvas for drawing fancy icons; it takes the
+                    # clicks itself
                     canvas = Canvas(
                         cell_frame,
                         width=45,
                         height=45,
                         bg='white',
-                        highlightthickness=0
-                    )
-                    canvas.pack()
-                    self.board_canvases[layer][row][col] = canvas
-
-                    # Create invisible button overlay for clicks
-                    btn = tk.Button(
-                        cell_frame,
-                        text="",
-                        font=('Arial', 1),
-                        width=6,
-                        height=2,
-                        command=lambda l=layer, r=row, c=col: self.human_move(l, r, c),
-                        bg='white',
-                        activebackground='#e0e0e0',
-                        relief=tk.FLAT,
+                        highlightthickness=0,
                         cursor='hand2'
                     )
-                    btn.place(x=0, y=0, width=45, height=45)
-                    self.board_buttons[layer][row][col] = btn
+                    canvas.pack()
+                    canvas.bind('<Button-1>',
+                                lambda e, l=layer, r=row, c=col: self.human_move(l, r, c))
+                    FancyIcon.prerender(canvas, 45)
+                    self.canvases[layer * 16 + row * 4 + col] = canvas
 
         # Right side - Controls
         control_frame = tk.Frame(main_container, width=200)
@@ -448,24 +519,19 @@ class TTT3D:
         """Handle piece selection change"""
         self.human_piece = self.piece_var.get()
         self.computer_piece = 'O' if self.human_piece == 'X' else 'X'
-        self.clear_board()
-        self.status_label.config(text="Good luck!", fg='black')
-        if not self.human_first:
-            if self.difficulty == 3:
-                self.computer_plays()
-            else:
-                self.computer_play_random()
+        self.human_value = 0 if self.human_piece == 'X' else 1
+        self.computer_value = 1 - self.human_value
+
+        # Stored scores are from the old computer value's point of view
+        self.tt = {}
+        if HAVE_NUMBA:
+            self._nb_tt = new_compiled_table()
+        self.new_game()
 
     def change_first(self):
         """Handle first move selection change"""
         self.human_first = (self.first_var.get() == 'Human')
-        self.clear_board()
-        self.status_label.config(text="Good luck!", fg='black')
-        if not self.human_first:
-            if self.difficulty == 3:
-                self.computer_plays()
-            else:
-                self.computer_play_random()
+        self.new_game()
 
     def change_difficulty(self):
         """Handle difficulty selection change"""
@@ -478,15 +544,9 @@ class TTT3D:
             self.total_looks_ahead = 2
         else:  # Hard
             self.difficulty = 3
-            self.total_looks_ahead = 4  # Reduced from 6 due to larger board
+            self.total_looks_ahead = 6  # Usually cut short by _THINK_TIME
 
-        self.clear_board()
-        self.status_label.config(text="Good luck!", fg='black')
-        if not self.human_first:
-            if self.difficulty == 3:
-                self.computer_plays()
-            else:
-                self.computer_play_random()
+        self.new_game()
 
     def new_game(self):
         """Start a new game"""
@@ -501,39 +561,43 @@ class TTT3D:
     def clear_board(self):
         """Reset the game board"""
         self.win = False
-        self.look_ahead_counter = 0
-        self.final_win = []
+        self.occ = [0, 0]
+        self.zkey = 0
+        self.flat = bytearray(b'\xff' * 64)
+        self.line_count = [[0] * 76, [0] * 76]
+        self.potential = [76, 76]
+        self.threats = [set(), set()]
+        self.final_win = 0
         self.final_win_buttons = []
 
-        for layer in range(4):
-            for row in range(4):
-                for col in range(4):
-                    self.config[layer][row][col] = -1
-                    btn = self.board_buttons[layer][row][col]
-                    btn.config(state=tk.NORMAL, bg='white')
-                    # Clear the canvas
-                    canvas = self.board_canvases[layer][row][col]
-                    canvas.delete("all")
+        # Abandon any search in progress: drop it if it has not started yet,
+        # and tell it to stop otherwise, so that it does not hold up the
+        # worker. Transposition table entries stay valid for the next round,
+        # so the tables are kept
+        if self.search is not None:
+            self.search.cancel()
+            self.cancelled.set()
+        self.search = None
+        self.killers = [-1] * 8
+
+        for canvas in self.canvases:
+            canvas.config(bg='white', cursor='hand2')
+            FancyIcon.show(canvas)
 
     def human_move(self, layer: int, row: int, col: int):
         """Handle human player move"""
-        if self.config[layer][row][col] != -1 or self.win:
+        cell = layer * 16 + row * 4 + col
+        if (self.occ[0] | self.occ[1]) >> cell & 1 or self.win or self.search is not None:
             return
 
-        # Make the move
-        self.config[layer][row][col] = 0 if self.human_piece == 'X' else 1
-        self.board_buttons[layer][row][col].config(state=tk.DISABLED, bg='#f5f5f5')
+        # Make the move, checking first whether it completes a line
+        human_value = self.human_value
+        won = self.check_win(human_value, cell)
+        self._apply(human_value, cell)
 
-        # Draw fancy icon
-        canvas = self.board_canvases[layer][row][col]
-        if self.human_piece == 'X':
-            FancyIcon.draw_x(canvas, 45)
-        else:
-            FancyIcon.draw_o(canvas, 45)
+        self._draw_piece(cell, human_value)
 
-        # Check for win
-        move = OneMove(layer, row, col)
-        if self.check_win(0 if self.human_piece == 'X' else 1, move):
+        if won:
             self.status_label.config(
                 text="You beat me! Press New Game to play again.",
                 fg='red'
@@ -543,248 +607,395 @@ class TTT3D:
             self.disable_board()
             self.update_score()
         else:
-            # Computer's turn
-            self.root.after(100, self.computer_plays)
+            # Computer's turn; the search runs in the background, so start
+            # it now and let Tk draw the human's piece meanwhile
+            self.computer_plays()
 
     def computer_play_random(self):
         """Computer makes a random move (used for easier difficulties when going first)"""
-        empty_spaces = []
-        for layer in range(4):
-            for row in range(4):
-                for col in range(4):
-                    if self.config[layer][row][col] == -1:
-                        empty_spaces.append((layer, row, col))
-
-        if empty_spaces:
-            layer, row, col = random.choice(empty_spaces)
-            piece_value = 1 if self.computer_piece == 'X' else 0
-            self.config[layer][row][col] = piece_value
-            self.board_buttons[layer][row][col].config(state=tk.DISABLED, bg='#f5f5f5')
-
-            # Draw fancy icon
-            canvas = self.board_canvases[layer][row][col]
-            if self.computer_piece == 'X':
-                FancyIcon.draw_x(canvas, 45)
-            else:
-                FancyIcon.draw_o(canvas, 45)
+        # Reservoir-sample one empty cell while walking the empty bits
+        empty = ~(self.occ[0] | self.occ[1]) & (1 << 64) - 1
+        count = 0
+        pick = -1
+        while empty:
+            cell = (empty & -empty).bit_length() - 1
+            count += 1
+            if self.rng.random() * count < 1:
+                pick = cell
+            empty &= empty - 1
+
+        if pick >= 0:
+            self._play_computer_move(pick)
 
     def computer_plays(self):
-        """Computer makes a move using minimax algorithm"""
-        best_score = -10000
-        best_move = None
-        computer_value = 1 if self.computer_piece == 'X' else 0
+        """Start the computer's search without blocking the event loop"""
+        # Search a private copy of the position, so that New Game or a
+        # settings change cannot disturb it
+        self.progress = [0]
+        self.cancelled = threading.Event()
+        snapshot = copy.copy(self)
+        snapshot.occ = list(self.occ)
+        snapshot.flat = bytearray(self.flat)
+        snapshot.line_count = [list(counts) for counts in self.line_count]
+        snapshot.potential = list(self.potential)
+        snapshot.threats = [set(threats) for threats in self.threats]
+
+        self.search = self.executor.submit(snapshot._choose_move)
+        self.root.after(50, self._poll_search, self.search)
+
+    def _poll_search(self, search):
+        """Play the computer's move once its search has finished"""
+        if search is not self.search:
+            return  # The game was reset while searching
+        if not search.done():
+            # The compiled search releases the GIL, so Tk stays responsive
+            if self.progress[0] > 1:
+                self.status_label.config(
+                    text=f"Thinking... looking {self.progress[0]} moves ahead",
+                    fg='black'
+                )
+            self.root.after(50, self._poll_search, search)
+            return
 
-        # Check all possible moves
-        for layer in range(4):
-            for row in range(4):
-                for col in range(4):
-                    if self.config[layer][row][col] == -1:
-                        # Try this move
-                        move = OneMove(layer, row, col)
-
-                        # Check if this move wins immediately
-                        if self.check_win(computer_value, move):
-                            # Make the winning move
-                            self.config[layer][row][col] = computer_value
-                            self.board_buttons[layer][row][col].config(state=tk.DISABLED, bg='#f5f5f5')
-
-                            # Draw fancy icon
-                            canvas = self.board_canvases[layer][row][col]
-                            if self.computer_piece == 'X':
-                                FancyIcon.draw_x(canvas, 45)
-                            else:
-                                FancyIcon.draw_o(canvas, 45)
-
-                            self.status_label.config(
-                                text="I win! Press New Game to play again.",
-                                fg='red'
-                            )
-                            self.win = True
-                            self.computer_score += 1
-                            self.disable_board()
-                            self.update_score()
-                            return
-
-                        # Evaluate this move
-                        self.config[layer][row][col] = computer_value
-
-                        if self.difficulty != 1:
-                            h_value = self.look_ahead(
-                                0 if self.human_piece == 'X' else 1,
-                                -10000,
-                                10000
-                            )
-                        else:
-                            h_value = self.heuristic()
-
-                        self.look_ahead_counter = 0
-
-                        # Track best move
-                        if h_value >= best_score:
-                            best_score = h_value
-                            best_move = (layer, row, col)
-
-                        # Undo the move
-                        self.config[layer][row][col] = -1
-
-        # Make the best move
-        if best_move and not self.win:
-            layer, row, col = best_move
-            computer_value = 1 if self.computer_piece == 'X' else 0
-            self.config[layer][row][col] = computer_value
-            self.board_buttons[layer][row][col].config(state=tk.DISABLED, bg='#f5f5f5')
-
-            # Draw fancy icon
-            canvas = self.board_canvases[layer][row][col]
-            if self.computer_piece == 'X':
-                FancyIcon.draw_x(canvas, 45)
+        self.search = None
+        if self.progress[0] > 1:
+            self.status_label.config(text="Good luck!", fg='black')
+        cell = search.result()
+        if cell is not None:
+            self._play_computer_move(cell)
+
+    def _play_computer_move(self, cell: int):
+        """Place the computer's piece and check whether it won"""
+        computer_value = self.computer_value
+        won = self.check_win(computer_value, cell)
+        self._apply(computer_value, cell)
+
+        self._draw_piece(cell, computer_value)
+
+        if won:
+            self.status_label.config(
+                text="I win! Press New Game to play again.",
+                fg='red'
+            )
+            self.win = True
+            self.computer_score += 1
+            self.disable_board()
+            self.update_score()
+
+    def _choose_move(self) -> Optional[int]:
+        """Find the computer's move using minimax; runs on the worker thread"""
+        best_move = None
+        computer_value = self.computer_value
+        human_value = self.human_value
+
+        # Bound the transposition tables' memory. Only the worker thread uses
+        # them, so they are emptied here rather than from the Tk thread
+        if len(self.tt) > _TT_LIMIT:
+            self.tt.clear()
+        if HAVE_NUMBA and len(self._nb_tt) > _NB_TT_LIMIT:
+            self._nb_tt.clear()
+
+        # On the first move of either side, play from the opening book
+        if bin(self.occ[0] | self.occ[1]).count('1') <= 1:
+            return self.rng.choice([cell for cell in OPENING_CELLS
+                                  if not (self.occ[0] | self.occ[1]) >> cell & 1])
+
+        # Take an immediate win without searching
+        wins = self._threat_cells(computer_value)
+        if wins:
+            return wins[0]
+
+        # If the human threatens to win, only blocking moves are worth
+        # considering; a single forced block needs no search at all
+        moves = self._threat_cells(human_value) or self._ordered_moves(computer_value)
+        moves = fold_symmetric(moves, self.flat)
+        if len(moves) == 1:
+            best_move = moves[0]
+            moves = []
+
+        # Iterative deepening: each pass fills the transposition table with
+        # best-move hints for the next, and searches the root moves in order
+        # of the previous pass's scores
+        # No deeper than the plies left after the computer's move
+        start = time.monotonic()
+        deadline = start + _THINK_TIME
+        max_depth = min(self.total_looks_ahead,
+                        63 - bin(self.occ[0] | self.occ[1]).count('1'))
+        depths = range(1, max_depth + 1) if self.difficulty != 1 else (0,)
+        for depth in depths:
+            if not moves:
+                break
+            # The first pass ignores the deadline, so unless the search is
+            # cancelled there is a move to play
+            self.progress[0] = depth
+            scores = self._search_root(moves, depth,
+                                       deadline if best_move is not None else None)
+            if scores is None:
+                # Out of time or cancelled: keep the last complete pass's move
+                break
+
+            # Each root move gets a full window, so equal scores are genuine
+            # ties; break them at random so the computer is not predictable
+            best_score = max(scores.values())
+            best_move = self.rng.choice([cell for cell in moves if scores[cell] == best_score])
+
+            # A proven win or loss will not change with more depth
+            if abs(best_score) >= 1000:
+                break
+            if time.monotonic() - start > _THINK_TIME / 4:
+                break
+            moves.sort(key=lambda cell: (cell == best_move, scores[cell]), reverse=True)
+
+        return best_move
+
+    def _search_root(self, moves: List[int], depth: int,
+                     deadline: Optional[float] = None) -> Optional[dict]:
+        """
+        Score each of the computer's moves with a depth-ply search, or
+        return None if the deadline passes or the search is cancelled first
+        """
+        computer_value = self.computer_value
+        human_value = self.human_value
+
+        scores = {}
+        for cell in moves:
+            if self.cancelled.is_set() or (deadline is not None
+                                           and time.monotonic() > deadline):
+                return None
+            self._apply(computer_value, cell)
+            if depth == 0:
+                scores[cell] = self.heuristic()
+            elif HAVE_NUMBA:
+                scores[cell] = self._nb_search(human_value, computer_value, depth)
             else:
-                FancyIcon.draw_o(canvas, 45)
+                scores[cell] = self.look_ahead(human_value, -10000, 10000, depth)
+            self._undo(computer_value, cell)
 
-    def look_ahead(self, player_value: int, alpha: int, beta: int) -> int:
-        """Minimax algorithm with alpha-beta pruning"""
-        if self.look_ahead_counter >= self.total_looks_ahead:
-            return self.heuristic()
+        return scores
 
-        self.look_ahead_counter += 1
-        computer_value = 1 if self.computer_piece == 'X' else 0
+    def look_ahead(self, player_value: int, alpha: int, beta: int, depth: int) -> int:
+        """Minimax algorithm with alpha-beta pruning, searching depth plies"""
+        # Stop at the depth limit, or when no move is left to play
+        if depth <= 0 or self.occ[0] | self.occ[1] == FULL_BOARD:
+            return self.heuristic()
 
-        if player_value == computer_value:
-            # Computer's turn (maximizing)
-            for layer in range(4):
-                for row in range(4):
-                    for col in range(4):
-                        if self.config[layer][row][col] == -1:
-                            move = OneMove(layer, row, col)
+        computer_value = self.computer_value
+        human_value = self.human_value
+
+        # A player with an open line of 3 wins on this move
+        if self.threats[player_value]:
+            return 1000 if player_value == computer_value else -1000
+
+        # Probe the transposition table; even a shallower entry still
+        # supplies the best move found for this position
+        key = self.zkey ^ ZOBRIST_SIDE if player_value else self.zkey
+        entry = self.tt.get(key)
+        best_cell = -1
+        if entry is not None:
+            best_cell = entry[3]
+        if entry is not None and entry[0] >= depth:
+            if entry[1] == EXACT:
+                return entry[2]
+            if entry[1] == LOWER:
+                alpha = max(alpha, entry[2])
+            else:
+                beta = min(beta, entry[2])
+            if alpha >= beta:
+                return entry[2]
+        alpha_orig, beta_orig = alpha, beta
 
-                            if self.check_win(computer_value, move):
-                                self.config[layer][row][col] = -1
-                                return 1000
+        moves = self._staged_moves(player_value, depth, best_cell)
 
-                            h_value = self.look_ahead(
-                                0 if self.human_piece == 'X' else 1,
-                                alpha,
-                                beta
-                            )
+        # Bound methods as locals for the move loops
+        apply, undo, look_ahead = self._apply, self._undo, self.look_ahead
 
-                            if h_value > alpha:
-                                alpha = h_value
+        if player_value == computer_value:
+            # Computer's turn (maximizing)
+            for cell in moves:
+                apply(computer_value, cell)
+                h_value = look_ahead(human_value, alpha, beta, depth - 1)
+                undo(computer_value, cell)
 
-                            self.config[layer][row][col] = -1
+                if h_value > alpha:
+                    alpha = h_value
+                    best_cell = cell
 
-                            if alpha >= beta:
-                                return alpha
+                if alpha >= beta:
+                    self.killers[depth] = cell
+                    break
 
-            return alpha
+            score = alpha
         else:
             # Human's turn (minimizing)
-            for layer in range(4):
-                for row in range(4):
-                    for col in range(4):
-                        if self.config[layer][row][col] == -1:
-                            move = OneMove(layer, row, col)
-
-                            if self.check_win(player_value, move):
-                                self.config[layer][row][col] = -1
-                                return -1000
+            for cell in moves:
+                apply(player_value, cell)
+                h_value = look_ahead(computer_value, alpha, beta, depth - 1)
+                undo(player_value, cell)
 
-                            h_value = self.look_ahead(computer_value, alpha, beta)
+                if h_value < beta:
+                    beta = h_value
+                    best_cell = cell
 
-                            if h_value < beta:
-                                beta = h_value
+                if alpha >= beta:
+                    self.killers[depth] = cell
+                    break
 
-                            self.config[layer][row][col] = -1
+            score = beta
 
-                            if alpha >= beta:
-                                return beta
+        if score <= alpha_orig:
+            flag = UPPER
+        elif score >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt[key] = (depth, flag, score, best_cell)
+        return score
+
+    def _staged_moves(self, player_value: int, depth: int, hint: int):
+        """
+        Yield the moves to search at a node: the transposition table's best
+        move and this depth's killer first, so that a cutoff by either one
+        skips sorting the rest
+        """
+        # If the opponent threatens to win, only the blocking moves matter
+        blocks = self._threat_cells(1 - player_value)
+        if blocks:
+            if hint in blocks:
+                blocks.remove(hint)
+                blocks.insert(0, hint)
+            yield from blocks
+            return
 
-            return beta
+        tried = []
+        for cell in (hint, self.killers[depth]):
+            if cell >= 0 and self.flat[cell] == 255 and cell not in tried:
+                tried.append(cell)
+                yield cell
+        for cell in self._ordered_moves(player_value):
+            if cell not in tried:
+                yield cell
+
+    def _nb_search(self, player_value: int, computer_value: int, depth: int) -> int:
+        """Run the compiled look-ahead on the current board"""
+        key = self.zkey ^ ZOBRIST_SIDE if player_value else self.zkey
+        return compiled_search(self.flat, self.line_count, self.potential, player_value,
+                               computer_value, depth, key, self._nb_tt)
+
+    def _ordered_moves(self, player_value: int) -> List[int]:
+        """
+        Empty cells sorted so the moves most likely to cause an alpha-beta
+        cutoff are tried first
+        """
+        flat = self.flat
+        moves = [cell for cell in CELLS if flat[cell] == 255]
+        own_counts = self.line_count[player_value]
+        opp_counts = self.line_count[1 - player_value]
+
+        def score(cell):
+            # Reward extending our own open lines and blocking the
+            # opponent's; completing or blocking a line of 3 dominates
+            total = 0
+            for li in self.lines_through_cell[cell]:
+                own, opp = own_counts[li], opp_counts[li]
+                if not opp:
+                    total += 1000 if own == 3 else 1 + own
+                if not own:
+                    total += 100 if opp == 3 else 1 + opp
+            return total
+
+        moves.sort(key=score, reverse=True)
+        return moves
 
     def heuristic(self) -> int:
         """Calculate heuristic value of current board state"""
-        computer_value = 1 if self.computer_piece == 'X' else 0
-        human_value = 0 if self.human_piece == 'X' else 1
-
-        return self.check_available(computer_value) - self.check_available(human_value)
-
-    def check_win(self, player_value: int, move: OneMove) -> bool:
-        """Check if the given move creates a winning condition"""
-        # Temporarily place the piece
-        original = self.config[move.layer][move.row][move.column]
-        self.config[move.layer][move.row][move.column] = player_value
-
-        # Create game board array
-        game_board = [0] * 64
-        index = 0
-        for layer in range(4):
-            for row in range(4):
-                for col in range(4):
-                    if self.config[layer][row][col] == player_value:
-                        game_board[index] = 1
-                    index += 1
-
-        # Check all winning combinations
-        for win_combo in self.winning_combinations:
-            if all(game_board[pos] == 1 for pos in win_combo):
-                self.final_win = win_combo
-                # Restore original value
-                if original != player_value:
-                    self.config[move.layer][move.row][move.column] = original
+        return self.potential[self.computer_value] - self.potential[self.human_value]
+
+    def check_win(self, player_value: int, cell: int) -> bool:
+        """
+        Check if playing the empty cell (layer * 16 + row * 4 + col)
+        completes a line for the player
+        """
+        # Only the lines through the new cell can be completed by it, and
+        # one is exactly when the player already has the other 3 cells
+        counts = self.line_count[player_value]
+        for li in self.lines_through_cell[cell]:
+            if counts[li] == 3:
+                self.final_win = self.win_masks[li]
                 return True
 
-        # Restore original value
-        self.config[move.layer][move.row][move.column] = original
         return False
 
-    def check_available(self, player_value: int) -> int:
-        """Count available winning paths for the given player"""
-        win_counter = 0
-
-        # Create game board array
-        game_board = [0] * 64
-        index = 0
-        for layer in range(4):
-            for row in range(4):
-                for col in range(4):
-                    if (self.config[layer][row][col] == player_value or
-                        self.config[layer][row][col] == -1):
-                        game_board[index] = 1
-                    index += 1
-
-        # Check all winning combinations
-        for win_combo in self.winning_combinations:
-            if all(game_board[pos] == 1 for pos in win_combo):
-                win_counter += 1
-
-        return win_counter
+    def _apply(self, player_value: int, cell: int):
+        """Place a piece on an empty cell and update the line counters"""
+        self.occ[player_value] |= 1 << cell
+        self.flat[cell] = player_value
+        self.zkey ^= ZOBRIST_KEYS[player_value][cell]
+        counts = self.line_count[player_value]
+        opp_counts = self.line_count[1 - player_value]
+        potential = self.potential
+        for li in self.lines_through_cell[cell]:
+            counts[li] += 1
+            if not opp_counts[li]:
+                # (k + 1)^2 - k^2 for the player's k pieces before this one
+                potential[player_value] += 2 * counts[li] - 1
+            if counts[li] == 1:
+                # First piece on this line: it is closed to the opponent
+                potential[1 - player_value] -= 1 + opp_counts[li] ** 2
+                if opp_counts[li] == 3:
+                    self.threats[1 - player_value].discard(li)
+            elif counts[li] == 3 and not opp_counts[li]:
+                self.threats[player_value].add(li)
+            elif counts[li] == 4:
+                self.threats[player_value].discard(li)
+
+    def _undo(self, player_value: int, cell: int):
+        """Remove a piece placed by _apply"""
+        self.occ[player_value] ^= 1 << cell
+        self.flat[cell] = 255
+        self.zkey ^= ZOBRIST_KEYS[player_value][cell]
+        counts = self.line_count[player_value]
+        opp_counts = self.line_count[1 - player_value]
+        potential = self.potential
+        for li in self.lines_through_cell[cell]:
+            counts[li] -= 1
+            if not opp_counts[li]:
+                potential[player_value] -= 2 * counts[li] + 1
+            if counts[li] == 0:
+                potential[1 - player_value] += 1 + opp_counts[li] ** 2
+                if opp_counts[li] == 3:
+                    self.threats[1 - player_value].add(li)
+            elif counts[li] == 2 and not opp_counts[li]:
+                self.threats[player_value].discard(li)
+            elif counts[li] == 3:
+                self.threats[player_value].add(li)
+
+    def _threat_cells(self, player_value: int) -> List[int]:
+        """Empty cells that would complete a line for the player"""
+        empty = ~(self.occ[0] | self.occ[1])
+        return sorted({(self.win_masks[li] & empty).bit_length() - 1
+                       for li in self.threats[player_value]})
+
+    def _draw_piece(self, cell: int, player_value: int):
+        """Show a piece of the given value on its cell"""
+        canvas = self.canvases[cell]
+        canvas.config(bg='#f5f5f5', cursor='')
+        FancyIcon.show(canvas, _PIECE_TAGS[player_value])
 
     def disable_board(self):
         """Disable board after game ends and highlight winning combination"""
         if self.final_win:
-            # Convert winning indices to button coordinates
-            self.final_win_buttons = []
-            for idx in self.final_win:
-                layer = idx // 16
-                remainder = idx % 16
-                row = remainder // 4
-                col = remainder % 4
-                self.final_win_buttons.append((layer, row, col))
-
-        # Disable all buttons and redraw winning pieces in gold
-        for layer in range(4):
-            for row in range(4):
-                for col in range(4):
-                    btn = self.board_buttons[layer][row][col]
-                    btn.config(state=tk.DISABLED)
-
-                    # Redraw winning pieces in gold
-                    if (layer, row, col) in self.final_win_buttons:
-                        canvas = self.board_canvases[layer][row][col]
-                        piece_value = self.config[layer][row][col]
-                        if piece_value == 0:  # X
-                            FancyIcon.draw_x_win(canvas, 45)
-                        elif piece_value == 1:  # O
-                            FancyIcon.draw_o_win(canvas, 45)
+            # Convert winning cell bits to board coordinates
+            self.final_win_buttons = [COORDS[idx] for idx in CELLS
+                                     if self.final_win >> idx & 1]
+
+        # Clicks are ignored once self.win is set; drop the hand cursor from
+        # the empty cells (played ones lost it already) and redraw winning
+        # pieces in gold
+        for idx in CELLS:
+            if self.flat[idx] == 255:
+                self.canvases[idx].config(cursor='')
+            elif self.final_win >> idx & 1:
+                FancyIcon.show(self.canvases[idx], _WIN_TAGS[self.flat[idx]])
 
     def update_score(self):
         """Update the score display"""
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Numba-compiled alpha-beta search for 3D Tic-Tac-Toe (4x4x4)
+
+The native counterpart of TTT3D.look_ahead, used when Numba is installed.
+Kept apart from ttt3d_engine so that importing the shared tables does not
+load Numba.
+"""
+
+from ttt3d_engine import ZOBRIST_KEYS, ZOBRIST_SIDE, EXACT, LOWER, UPPER, LINES_THROUGH_CELL
+
+# Optional: compile the search with Numba when it is installed
+try:
+    import numpy as np
+    from numba import njit, types
+    from numba.typed import Dict
+except ImportError:
+    np = njit = None
+HAVE_NUMBA = njit is not None
+
+
+if njit is not None:
+    # The Zobrist keys as an array for the compiled search
+    _ZOBRIST = np.array(ZOBRIST_KEYS, dtype=np.int64)
+
+    # LINES_THROUGH_CELL flattened for the compiled search: the lines through
+    # cell c are _NB_LINES[_NB_OFFSETS[c]:_NB_OFFSETS[c + 1]]
+    _NB_LINES = np.array([li for lines in LINES_THROUGH_CELL for li in lines],
+                         dtype=np.int64)
+    _NB_OFFSETS = np.cumsum([0] + [len(lines) for lines in LINES_THROUGH_CELL])
+
+    @njit(cache=True, nogil=True)
+    def _nb_look_ahead(board, line_count, potential, player, computer, alpha, beta,
+                       depth, lines, offsets, zobrist, side_key, key, tt):
+        """
+        Compiled alpha-beta search, the native counterpart of TTT3D.look_ahead
+
+        board is an int8 array of 64 cells (-1 empty, else the piece value),
+        line_count and potential are array copies of the TTT3D counters; all
+        three are updated in place and restored on return. The lines through
+        cell c are lines[offsets[c]:offsets[c + 1]]. key is the Zobrist hash
+        of the position and side to move, and tt maps it to
+        (depth, flag, score, best cell).
+        """
+        if depth == 0:
+            return potential[computer] - potential[1 - computer]
+
+        # Probe the transposition table; even a shallower entry still
+        # supplies the best move found for this position
+        best_cell = -1
+        if key in tt:
+            entry = tt[key]
+            best_cell = entry[3]
+            if entry[0] >= depth:
+                if entry[1] == EXACT:
+                    return entry[2]
+                if entry[1] == LOWER:
+                    alpha = max(alpha, entry[2])
+                else:
+                    beta = min(beta, entry[2])
+                if alpha >= beta:
+                    return entry[2]
+        alpha_orig, beta_orig = alpha, beta
+
+        opponent = 1 - player
+
+        # Score the empty cells as in TTT3D._ordered_moves, collecting the
+        # cells that block an opponent's open line of 3 on the side
+        moves = np.empty(64, np.int64)
+        scores = np.empty(64, np.int64)
+        blocks = np.empty(64, np.int64)
+        n = 0
+        n_blocks = 0
+        for c in range(64):
+            if board[c] == -1:
+                total = 0
+                for k in range(offsets[c], offsets[c + 1]):
+                    own = line_count[player, lines[k]]
+                    opp = line_count[opponent, lines[k]]
+                    if opp == 0:
+                        if own == 3:
+                            # Completing this line wins outright
+                            return 1000 if player == computer else -1000
+                        total += 1 + own
+                    if own == 0:
+                        if opp == 3:
+                            total += 100
+                            if n_blocks == 0 or blocks[n_blocks - 1] != c:
+                                blocks[n_blocks] = c
+                                n_blocks += 1
+                        else:
+                            total += 1 + opp
+                moves[n] = c
+                scores[n] = -total
+                if c == best_cell:
+                    scores[n] = -(1 << 30)
+                n += 1
+        if n == 0:
+            # The board is full
+            return potential[computer] - potential[1 - computer]
+        if n_blocks:
+            # The opponent threatens to win: only the blocking moves matter
+            moves = blocks
+            n = n_blocks
+            scores = np.zeros(n, np.int64)
+            for j in range(n):
+                if moves[j] == best_cell:
+                    scores[j] = -1
+        order = np.argsort(scores[:n], kind='mergesort')
+
+        for j in range(n):
+            c = moves[order[j]]
+            board[c] = player
+            for k in range(offsets[c], offsets[c + 1]):
+                line_count[player, lines[k]] += 1
+                own = line_count[player, lines[k]]
+                opp = line_count[opponent, lines[k]]
+                if opp == 0:
+                    potential[player] += 2 * own - 1
+                if own == 1:
+                    potential[opponent] -= 1 + opp * opp
+
+            h_value = _nb_look_ahead(board, line_count, potential, opponent, computer,
+                                     alpha, beta, depth - 1, lines, offsets, zobrist,
+                                     side_key, key ^ zobrist[player, c] ^ side_key, tt)
+
+            board[c] = -1
+            for k in range(offsets[c], offsets[c + 1]):
+                line_count[player, lines[k]] -= 1
+                own = line_count[player, lines[k]]
+                opp = line_count[opponent, lines[k]]
+                if opp == 0:
+                    potential[player] -= 2 * own + 1
+                if own == 0:
+                    potential[opponent] += 1 + opp * opp
+
+            if player == computer:
+                if h_value > alpha:
+                    alpha = h_value
+                    best_cell = c
+            elif h_value < beta:
+                beta = h_value
+                best_cell = c
+            if alpha >= beta:
+                break
+
+        score = alpha if player == computer else beta
+        if score <= alpha_orig:
+            flag = UPPER
+        elif score >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        tt[key] = (depth, flag, score, best_cell)
+        return score
+
+    def new_compiled_table():
+        """An empty transposition table for compiled_search"""
+        return Dict.empty(key_type=types.int64,
+                          value_type=types.UniTuple(types.int64, 4))
+
+    def compiled_search(flat, line_count, potential, player, computer, depth, key, tt):
+        """
+        Score the position after the computer's move with the compiled
+        search, from player's side to move; flat is the byte board (255 for
+        empty) and key its Zobrist key including the side to move
+        """
+        # The kernel plays and takes back moves in place, so it can work on
+        # the byte board directly
+        board = np.frombuffer(flat, dtype=np.int8)
+        return _nb_look_ahead(board, np.array(line_count, dtype=np.int8),
+                              np.array(potential, dtype=np.int64), player, computer,
+                              -10000, 10000, depth, _NB_LINES, _NB_OFFSETS,
+                              _ZOBRIST, ZOBRIST_SIDE, key, tt)
+
+    def warm_up():
+        """Compile the search, or load it from Numba's cache, ahead of use"""
+        compiled_search(bytearray(b'\xff' * 64), [[0] * 76, [0] * 76], [76, 76],
+                        0, 1, 1, 0, new_compiled_table())
+else:
+    new_compiled_table = compiled_search = warm_up = None
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Search engine tables for 3D Tic-Tac-Toe (4x4x4)
+
+Board geometry, winning lines, symmetries and Zobrist keys shared by the
+games. Plain Python only: nothing here depends on tkinter or Numba (the
+compiled search lives in ttt3d_compiled).
+"""
+
+import random
+from itertools import permutations
+from typing import List, Sequence, Tuple
+
+# Board cells in bitboard order, and the (layer, row, col) of each
+CELLS = range(64)
+FULL_BOARD = (1 << 64) - 1
+COORDS = tuple((cell >> 4, (cell >> 2) & 3, cell & 3) for cell in CELLS)
+
+# The 48 symmetries of the cube (axis permutations times reflections), each
+# given as the image of every cell; they map winning lines onto winning lines
+SYMMETRIES = tuple(
+    tuple(sum((3 - c[a] if flips >> i & 1 else c[a]) << (4 - 2 * i)
+              for i, a in enumerate(axes)) for c in COORDS)
+    for axes in permutations(range(3)) for flips in range(8)
+)
+
+
+def fold_symmetric(moves: List[int], cell_values: Sequence[int]) -> List[int]:
+    """
+    Drop moves (cell indices) that a symmetry of the position maps onto an
+    earlier one; cell_values holds the content of every cell, with the same
+    value for all empty cells
+    """
+    # Symmetries that leave the current position unchanged
+    stabilizer = [sym for sym in SYMMETRIES
+                  if all(cell_values[sym[cell]] == cell_values[cell] for cell in CELLS)]
+    if len(stabilizer) == 1:
+        return moves
+
+    seen = set()
+    folded = []
+    for cell in moves:
+        if cell not in seen:
+            folded.append(cell)
+            seen.update(sym[cell] for sym in stabilizer)
+    return folded
+
+# Zobrist keys for the transposition tables: one random signed 64-bit value
+# per (piece value, cell), plus one for the side to move. A position's key
+# is the XOR of the keys of its pieces, updated as pieces come and go
+_zobrist_rng = random.Random(64)
+ZOBRIST_KEYS = tuple(tuple(_zobrist_rng.getrandbits(64) - 2 ** 63 for _ in CELLS)
+                     for _ in range(2))
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64) - 2 ** 63
+
+# Transposition table entry flags: the stored score is exact, a lower
+# bound (the search failed high) or an upper bound (it failed low)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+def _build_winning_combinations() -> Tuple[Tuple[int, ...], ...]:
+    """Generate all possible winning combinations for 4x4x4 board"""
+    wins = []
+
+    # Helper function to convert 3D coordinates to 1D index
+    def coord_to_index(layer, row, col):
+        return layer * 16 + row * 4 + col
+
+    # 1. Rows on each layer
+    for layer in range(4):
+        for row in range(4):
+            wins.append(tuple(coord_to_index(layer, row, col) for col in range(4)))
+
+    # 2. Columns on each layer
+    for layer in range(4):
+        for col in range(4):
+            wins.append(tuple(coord_to_index(layer, row, col) for row in range(4)))
+
+    # 3. Diagonals on each layer
+    for layer in range(4):
+        # Main diagonal
+        wins.append(tuple(coord_to_index(layer, i, i) for i in range(4)))
+        # Anti-diagonal
+        wins.append(tuple(coord_to_index(layer, i, 3-i) for i in range(4)))
+
+    # 4. Vertical lines through layers
+    for row in range(4):
+        for col in range(4):
+            wins.append(tuple(coord_to_index(layer, row, col) for layer in range(4)))
+
+    # 5. Diagonal lines through layers (in vertical planes)
+    # Front-to-back diagonals
+    for col in range(4):
+        # Descending
+        wins.append(tuple(coord_to_index(i, i, col) for i in range(4)))
+        # Ascending
+        wins.append(tuple(coord_to_index(i, 3-i, col) for i in range(4)))
+
+    # Left-to-right diagonals
+    for row in range(4):
+        # Descending
+        wins.append(tuple(coord_to_index(i, row, i) for i in range(4)))
+        # Ascending
+        wins.append(tuple(coord_to_index(i, row, 3-i) for i in range(4)))
+
+    # 6. Space diagonals (corner to corner)
+    # Main space diagonals
+    wins.append(tuple(coord_to_index(i, i, i) for i in range(4)))  # (0,0,0) to (3,3,3)
+    wins.append(tuple(coord_to_index(i, i, 3-i) for i in range(4)))  # (0,0,3) to (3,3,0)
+    wins.append(tuple(coord_to_index(i, 3-i, i) for i in range(4)))  # (0,3,0) to (3,0,3)
+    wins.append(tuple(coord_to_index(i, 3-i, 3-i) for i in range(4)))  # (0,3,3) to (3,0,0)
+
+    return tuple(wins)
+
+
+# All 76 winning lines, each one as a bitmask over the board cells, and the
+# indices of the lines passing through each cell (at most 7)
+WINNING_COMBINATIONS = _build_winning_combinations()
+WIN_MASKS = tuple(sum(1 << pos for pos in combo) for combo in WINNING_COMBINATIONS)
+LINES_THROUGH_CELL = tuple(
+    tuple(i for i, combo in enumerate(WINNING_COMBINATIONS) if cell in combo)
+    for cell in CELLS
+)
+
+# Opening book: the 8 corners and 8 inner cells each lie on 7 winning lines,
+# the most of any cell, and are the strongest first replies
+OPENING_CELLS = tuple(cell for cell in CELLS if len(LINES_THROUGH_CELL[cell]) == 7)